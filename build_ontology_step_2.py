@@ -45,17 +45,18 @@ def main(rel_set='nutrition_step_2',
             # Retrieve all the recipes for the class
             instances = list(get_filtered_instances(cls, path_final_ontology.name[:-4]))
             for recipe in instances:
-                if human_name(recipe) in recipes.keys() and len(recipes[human_name(recipe)]) > 0:
+                recipe_name = human_name(recipe)
+                if recipe_name in recipes.keys() and len(recipes[recipe_name]) > 0:
                     updated = False
                     # Add the ingredients to the recipe
-                    for ingredient in recipes[human_name(recipe)]:
-                        if kg.onto[ingredient] is not None:
+                    for ingredient_name in recipes[recipe_name]:
+                        ingredient = kg.onto[ingredient_name]
+                        if ingredient is not None:
                             if not updated:
-                                processed_recipes.add(human_name(recipe))
-                                print("Processed: {}".format(human_name(recipe)))
+                                processed_recipes.add(recipe_name)
+                                print("Processed: {}".format(recipe_name))
                                 updated = True
-                            print("Ingredient: {}".format(ingredient))
-                            ingredient = kg.onto[ingredient]
+                            print("Ingredient: {}".format(ingredient_name))
                             kg.add_property(recipe, kg.onto.hasForIngredient, ingredient)
                             kg.add_property(ingredient, kg.onto.ingredientOf, recipe)
 
@@ -2,8 +2,9 @@ import re
 from nltk.corpus import stopwords
 
 
-stopwords = stopwords.words('english')
-stopwords.extend([
+# a set, since it is only used for membership tests in the search hot paths
+stopwords = set(stopwords.words('english'))
+stopwords.update([
     'everything', 'everybody', 'everyone',
     'anything', 'anybody', 'anyone',
     'something', 'somebody', 'someone',
@@ -31,13 +31,14 @@ def populate_recipe(recipes_tmp: dict[str: list[str]], processed_tmp: set[str],
             # Retrieve all the recipes for the class
             instances_tmp = list(get_filtered_instances(cls_tmp, ontology_tmp.name[:-4]))
             for recipe_tmp in instances_tmp:
-                if human_name(recipe_tmp) in processed_tmp:
+                recipe_name_tmp = human_name(recipe_tmp)
+                if recipe_name_tmp in processed_tmp:
                     continue
-                processed_tmp.add(human_name(recipe_tmp))
+                processed_tmp.add(recipe_name_tmp)
                 # Get the ingredients
                 ingredients = [x.name for x in getattr(recipe_tmp, kg_aux.onto.hasForIngredient.name)]
                 # Add the recipe to the dictionary
-                recipes_tmp[human_name(recipe_tmp)] = ingredients
+                recipes_tmp[recipe_name_tmp] = ingredients
 
 
 if __name__ == "__main__":
@@ -65,32 +66,34 @@ if __name__ == "__main__":
             # Retrieve all the recipes for the class
             instances = list(get_filtered_instances(cls, PATH_ONTOLOGY_FINAL.name[:-4]))
             for recipe in instances:
-                if human_name(recipe) in processed:
+                # the fancy name lookup queries the ontology, so do it once
+                recipe_name = human_name(recipe)
+                if recipe_name in processed:
                     continue
-                processed.add(human_name(recipe))
-                tmp_json_config_file = '\t"is_ingredient_of_{}": '.format(name_to_snake_case(human_name(recipe))) + '{\n\t\t'
+                processed.add(recipe_name)
+                tmp_json_config_file = '\t"is_ingredient_of_{}": '.format(name_to_snake_case(recipe_name)) + '{\n\t\t'
                 tmp_json_config_file += '"init_prompts": [\n\t\t\t'
-                tmp_json_config_file += '"<ENT0> is ingredient of {} ."\n\t\t'.format(human_name(recipe))
+                tmp_json_config_file += '"<ENT0> is ingredient of {} ."\n\t\t'.format(recipe_name)
                 tmp_json_config_file += "],\n"
 
                 # Check if the recipe is present in the auxiliary ontology
                 # If positive add some seed entity tuples
-                if human_name(recipe) in recipes.keys() and len(recipes[human_name(recipe)]) > 0:
-                    print("Processed: {}".format(human_name(recipe)))
-                    covered.add(human_name(recipe))
+                if recipe_name in recipes.keys() and len(recipes[recipe_name]) > 0:
+                    print("Processed: {}".format(recipe_name))
+                    covered.add(recipe_name)
                     json_config_file += tmp_json_config_file
                     json_config_file += '\t\t"seed_ent_tuples": [\n'
-                    number_of_tuples = min(len(recipes[human_name(recipe)]), MAX_NUMBER_SEED_ENT_TUPLES)
+                    number_of_tuples = min(len(recipes[recipe_name]), MAX_NUMBER_SEED_ENT_TUPLES)
                     for i in range(number_of_tuples):
-                        ingredient = recipes[human_name(recipe)][i]
+                        ingredient = recipes[recipe_name][i]
                         json_config_file += '\t\t\t[\n\t\t\t\t"{}"\n\t\t\t],\n'.format(ingredient.replace('_', ' '))
                     # remove the last comma
                     json_config_file = json_config_file[:-2] + "\n"
                     json_config_file += "\t\t]\n"
                     json_config_file += '\t},\n'
                 else:
-                    print("Skipped: {}".format(human_name(recipe)))
-                    skipped.add(human_name(recipe))
+                    print("Skipped: {}".format(recipe_name))
+                    skipped.add(recipe_name)
         # remove the last comma
         json_config_file = json_config_file[:-2] + "\n"
         json_config_file += '}'
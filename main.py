@@ -1,10 +1,68 @@
 import os
 import json
 import fire
+import torch
+import multiprocessing
 
 from models.knowledge_harvester import KnowledgeHarvester
 
 
+_knowledge_harvester = None
+_output_dir = None
+_use_init_prompts = None
+
+
+def harvest_relation(knowledge_harvester, output_dir, rel, info,
+                     use_init_prompts):
+    print(f'Harvesting for relation {rel}...')
+    os.makedirs(f'{output_dir}/{rel}', exist_ok=True)
+
+    knowledge_harvester.clear()
+
+    knowledge_harvester.set_seed_ent_tuples(
+        seed_ent_tuples=info['seed_ent_tuples'])
+    knowledge_harvester.set_prompts(
+        prompts=info['init_prompts'] if use_init_prompts
+        else list(set(info['init_prompts'] + info['prompts'])))
+
+    knowledge_harvester.update_prompts()
+    json.dump(knowledge_harvester.weighted_prompts, open(
+        f'{output_dir}/{rel}/prompts.json', 'w'), indent=4)
+
+    for prompt, weight in knowledge_harvester.weighted_prompts:
+        print(f'{weight:.4f} {prompt}')
+
+    knowledge_harvester.update_ent_tuples()
+
+    # ent_tuples.json marks a relation as done, so it only appears once the
+    # harvest succeeded and is fully written
+    tmp_path = f'{output_dir}/{rel}/ent_tuples.json.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(knowledge_harvester.weighted_ent_tuples, f, indent=4)
+    os.replace(tmp_path, f'{output_dir}/{rel}/ent_tuples.json')
+
+
+def _init_worker(gpu_ids, harvester_kwargs, output_dir, use_init_prompts):
+    # every worker process holds its own model on a dedicated gpu
+    global _knowledge_harvester, _output_dir, _use_init_prompts
+    _output_dir = output_dir
+    _use_init_prompts = use_init_prompts
+    gpu_id = gpu_ids.get()
+    torch.cuda.set_device(gpu_id)
+    _knowledge_harvester = KnowledgeHarvester(
+        device=f'cuda:{gpu_id}', **harvester_kwargs)
+
+
+def _harvest_relation_in_worker(job):
+    rel, info = job
+    harvest_relation(
+        knowledge_harvester=_knowledge_harvester,
+        output_dir=_output_dir,
+        rel=rel,
+        info=info,
+        use_init_prompts=_use_init_prompts)
+
+
 def main(rel_set='nutrition',
          model_name='gpt-3.5-turbo',
          max_n_ent_tuples=1000,
@@ -12,53 +70,67 @@ def main(rel_set='nutrition',
          prompt_temp=2.,
          max_word_repeat=5,
          max_ent_subwords=2,
-         use_init_prompts=False):
+         use_init_prompts=False,
+         score_weights=(1., 1., 1.),
+         compile_model=False,
+         use_fp16=False,
+         n_gpus=1):
 
-    knowledge_harvester = KnowledgeHarvester(
+    harvester_kwargs = dict(
         model_name=model_name,
         max_n_ent_tuples=max_n_ent_tuples,
         max_n_prompts=max_n_prompts,
         max_word_repeat=max_word_repeat,
         max_ent_subwords=max_ent_subwords,
-        prompt_temp=prompt_temp)
+        prompt_temp=prompt_temp,
+        score_weights=score_weights,
+        compile_model=compile_model,
+        use_fp16=use_fp16)
 
     relation_info = json.load(open(f'relation_info/{rel_set}.json'))
 
-    for rel, info in relation_info.items():
-        print(f'Harvesting for relation {rel}...')
+    setting = f'{max_n_ent_tuples}tuples'
+    if use_init_prompts:
+        setting += '_initprompts'
+    else:
+        setting += f'_top{max_n_prompts}prompts'
 
-        setting = f'{max_n_ent_tuples}tuples'
-        if use_init_prompts:
-            setting += '_initprompts'
-        else:
-            setting += f'_top{max_n_prompts}prompts'
+    output_dir = f'results/{rel_set}/{setting}/{model_name}'
 
-        output_dir = f'results/{rel_set}/{setting}/{model_name}'
+    jobs = []
+    for rel, info in relation_info.items():
         if os.path.exists(f'{output_dir}/{rel}/ent_tuples.json'):
             print(f'file {output_dir}/{rel}/ent_tuples.json exists, skipped.')
             continue
-        else:
-            os.makedirs(f'{output_dir}/{rel}', exist_ok=True)
-            json.dump([], open(f'{output_dir}/{rel}/ent_tuples.json', 'w'))
 
-        knowledge_harvester.clear()
+        jobs.append((rel, info))
 
-        knowledge_harvester.set_seed_ent_tuples(
-            seed_ent_tuples=info['seed_ent_tuples'])
-        knowledge_harvester.set_prompts(
-            prompts=info['init_prompts'] if use_init_prompts
-            else list(set(info['init_prompts'] + info['prompts'])))
+    if n_gpus <= 1:
+        knowledge_harvester = KnowledgeHarvester(**harvester_kwargs)
+        for rel, info in jobs:
+            harvest_relation(
+                knowledge_harvester=knowledge_harvester,
+                output_dir=output_dir,
+                rel=rel,
+                info=info,
+                use_init_prompts=use_init_prompts)
+        return
 
-        knowledge_harvester.update_prompts()
-        json.dump(knowledge_harvester.weighted_prompts, open(
-            f'{output_dir}/{rel}/prompts.json', 'w'), indent=4)
+    if n_gpus > torch.cuda.device_count():
+        raise ValueError(f'n_gpus={n_gpus} but only '
+                         f'{torch.cuda.device_count()} cuda devices found')
 
-        for prompt, weight in knowledge_harvester.weighted_prompts:
-            print(f'{weight:.4f} {prompt}')
+    # relations are independent, so they are spread over one process per gpu
+    ctx = multiprocessing.get_context('spawn')
+    gpu_ids = ctx.Queue()
+    for gpu_id in range(n_gpus):
+        gpu_ids.put(gpu_id)
 
-        knowledge_harvester.update_ent_tuples()
-        json.dump(knowledge_harvester.weighted_ent_tuples, open(
-            f'{output_dir}/{rel}/ent_tuples.json', 'w'), indent=4)
+    with ctx.Pool(processes=n_gpus,
+                  initializer=_init_worker,
+                  initargs=(gpu_ids, harvester_kwargs,
+                            output_dir, use_init_prompts)) as pool:
+        pool.map(_harvest_relation_in_worker, jobs, chunksize=1)
 
 
 if __name__ == '__main__':
@@ -172,36 +172,48 @@ class EntityTupleSearcher:
 
             return
 
-        mask_logits_total = None
-        for raw_prompt, weight in weighted_prompts:
-            prompt = raw_prompt.replace(
-                f'<ENT{ent_idx}>',
-                self._model.tokenizer.decode(cur_token_ids).lower() +
-                self._model.tokenizer.mask_token * (
-                        n_masks[ent_idx] - len(cur_token_ids)))
-
-            input_text = get_masked_prompt(
+        cur_ent = self._model.tokenizer.decode(cur_token_ids).lower() + \
+            self._model.tokenizer.mask_token * (
+                    n_masks[ent_idx] - len(cur_token_ids))
+
+        input_texts = []
+        for raw_prompt, _ in weighted_prompts:
+            prompt = raw_prompt.replace(f'<ENT{ent_idx}>', cur_ent)
+
+            input_texts.append(get_masked_prompt(
                 prompt=prompt, n_masks=n_masks,
-                mask_token=self._model.tokenizer.mask_token)
-            mask_logits = self._model.get_mask_logits(input_text=input_text)
+                mask_token=self._model.tokenizer.mask_token))
 
-            mask_idx_in_prompt = get_mask_place(
-                ent_idx=ent_idx, n_masks=n_masks, prompt=raw_prompt)
-            mask_logits = mask_logits[mask_idx_in_prompt]
+        # all prompts go through the model as a single padded batch
+        batch_mask_logits = self._model.get_batch_mask_logits(
+            input_texts=input_texts)
 
-            if mask_logits_total is None:
-                mask_logits_total = torch.zeros_like(mask_logits)
-            mask_logits_total = mask_logits_total + mask_logits * weight
+        mask_logits = torch.stack([
+            prompt_mask_logits[get_mask_place(
+                ent_idx=ent_idx, n_masks=n_masks, prompt=raw_prompt)]
+            for (raw_prompt, _), prompt_mask_logits in zip(
+                weighted_prompts, batch_mask_logits)])
+        weights = torch.tensor(
+            [weight for _, weight in weighted_prompts],
+            dtype=mask_logits.dtype, device=mask_logits.device)
 
-        mask_logits_total = mask_logits_total / sum(
-            weight for _, weight in weighted_prompts)
+        mask_logits_total = weights @ mask_logits / weights.sum()
 
         mask_logits_total[self._model.banned_ids] = -float('inf')
         logprobs = torch.log_softmax(mask_logits_total, dim=-1)
         logprobs, pred_ids = torch.sort(logprobs, descending=True)
 
+        # the loop below stops at the first logprob under these bounds, so
+        # only the candidates above them are copied to the host, in one go
+        logprob_bound = logprob_threashold
+        if len(collected_ent_heap) == n:
+            logprob_bound = max(logprob_bound, collected_ent_heap[0][0])
+        n_candidates = int((logprobs >= logprob_bound).sum())
+        logprobs = logprobs[:n_candidates].tolist()
+        pred_ids = pred_ids[:n_candidates].tolist()
+
         for logprob, pred_id in zip(logprobs, pred_ids):
-            min_logprob_upd = min(cur_logprobs + [logprob.item()])
+            min_logprob_upd = min(cur_logprobs + [logprob])
             if len(collected_ent_heap) == n and \
                     min_logprob_upd < collected_ent_heap[0][0]:
                 break
@@ -209,12 +221,11 @@ class EntityTupleSearcher:
             if min_logprob_upd < logprob_threashold:
                 break
 
-            if not any([ch.isalpha() for ch in
-                        self._model.tokenizer.decode(pred_id)]):
+            pred_token = self._model.decoded_vocab[pred_id]
+            if not any([ch.isalpha() for ch in pred_token]):
                 continue
 
-            if any([punc in self._model.tokenizer.decode(pred_id)
-                    for punc in string.punctuation]):
+            if any([punc in pred_token for punc in string.punctuation]):
                 continue
 
             self.dfs_ent(
@@ -222,7 +233,7 @@ class EntityTupleSearcher:
                 n_masks=n_masks,
                 weighted_prompts=weighted_prompts,
                 cur_token_ids=cur_token_ids + [pred_id],
-                cur_logprobs=cur_logprobs + [logprob.item()],
+                cur_logprobs=cur_logprobs + [logprob],
                 collected_ent_heap=collected_ent_heap,
                 logprob_threashold=logprob_threashold,
                 n=n)
\ No newline at end of file
@@ -1,7 +1,11 @@
 import os
+import time
 import openai
 
 
+MAX_RETRIES = 5
+
+
 class GPT3:
     def __init__(self):
         openai.api_key = os.getenv("OPENAI_API_KEY")
@@ -16,7 +20,7 @@ class GPT3:
              presence_penalty=0,
              logprobs=0,
              n=1):
-        return openai.Completion.create(
+        return self._create(
             engine=engine,
             prompt=prompt,
             temperature=temperature,
@@ -26,3 +30,12 @@ class GPT3:
             presence_penalty=presence_penalty,
             logprobs=logprobs,
             n=n)
+
+    def _create(self, **kwargs):
+        for retry in range(MAX_RETRIES):
+            try:
+                return openai.Completion.create(**kwargs)
+            except openai.error.RateLimitError:
+                if retry == MAX_RETRIES - 1:
+                    raise
+                time.sleep(2 ** retry)
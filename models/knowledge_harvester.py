@@ -1,7 +1,8 @@
+import numpy as np
 from tqdm import tqdm
 from scipy.special import softmax
 
-from models.language_model_wrapper import LanguageModelWrapper
+from models.language_model_wrapper import LanguageModelWrapper, DEVICE
 from models.entity_tuple_searcher import EntityTupleSearcher
 
 from data_utils.data_utils import fix_prompt_style, is_valid_prompt
@@ -14,7 +15,11 @@ class KnowledgeHarvester:
                  max_n_ent_tuples=10000,
                  max_word_repeat=5,
                  max_ent_subwords=1,
-                 prompt_temp=1.):
+                 prompt_temp=1.,
+                 score_weights=(1., 1., 1.),
+                 device=DEVICE,
+                 compile_model=False,
+                 use_fp16=False):
         self._weighted_prompts = []
         self._weighted_ent_tuples = []
         self._max_n_prompts = max_n_prompts
@@ -23,15 +28,27 @@ class KnowledgeHarvester:
         self._max_ent_subwords = max_ent_subwords
         self._prompt_temp = prompt_temp
 
-        self._model = LanguageModelWrapper(model_name=model_name)
+        if len(score_weights) != 3 or sum(score_weights) == 0:
+            raise ValueError(
+                f'score_weights must be 3 weights with a non-zero sum, '
+                f'got {score_weights}')
+        self._score_weights = tuple(score_weights)
+
+        self._model = LanguageModelWrapper(
+            model_name=model_name,
+            device=device,
+            compile_model=compile_model,
+            use_fp16=use_fp16)
         self._ent_tuple_searcher = EntityTupleSearcher(model=self._model)
 
         self._seed_ent_tuples = None
+        self._metrics_cache = {}
 
     def clear(self):
         self._weighted_prompts = []
         self._weighted_ent_tuples = []
         self._seed_ent_tuples = None
+        self._metrics_cache = {}
 
     def set_seed_ent_tuples(self, seed_ent_tuples):
         self._seed_ent_tuples = seed_ent_tuples
@@ -89,7 +106,7 @@ class KnowledgeHarvester:
             max_word_repeat=self._max_word_repeat,
             max_ent_subwords=self._max_ent_subwords)
 
-        self._weighted_ent_tuples = []
+        best_ent_tuples, best_scores = [], []
         for ent_tuple in tqdm(ent_tuples, desc='re-scoring ent_tuples'):
             best_ent_tuple = None
             best_score = float('-inf')
@@ -106,15 +123,17 @@ class KnowledgeHarvester:
                     best_score = score
                     best_ent_tuple = coded_ent_tuple
 
-            self._weighted_ent_tuples.append([best_ent_tuple, best_score])
+            best_ent_tuples.append(best_ent_tuple)
+            best_scores.append(best_score)
 
-        self._weighted_ent_tuples = sorted(
-            self._weighted_ent_tuples, key=lambda t: t[1], reverse=True)
+        # scores are sorted as a flat array, tuples follow the same order
+        best_scores = np.asarray(best_scores, dtype=np.float64)
+        order = np.argsort(-best_scores, kind='stable')
 
-        norm_weights = softmax(
-            [weight for _, weight in self._weighted_ent_tuples])
-        for i, norm_weight in enumerate(norm_weights):
-            self._weighted_ent_tuples[i][1] = norm_weight
+        norm_weights = softmax(best_scores[order])
+        self._weighted_ent_tuples = [
+            [best_ent_tuples[i], norm_weight]
+            for i, norm_weight in zip(order, norm_weights)]
 
     def score_ent_tuple(self, ent_tuple):
         score = 0.
@@ -124,14 +143,27 @@ class KnowledgeHarvester:
         return score
 
     def score(self, prompt, ent_tuple):
-        logprobs = self._model.fill_ent_tuple_in_prompt(
-            prompt=prompt, ent_tuple=ent_tuple)['mask_logprobs']
+        metrics = self.score_metrics(prompt=prompt, ent_tuple=ent_tuple)
+
+        return sum(weight * metric for weight, metric in zip(
+            self._score_weights, metrics)) / sum(self._score_weights)
+
+    def score_metrics(self, prompt, ent_tuple):
+        # metrics do not depend on score_weights, so they are cached as-is
+        key = (prompt, tuple(ent_tuple))
+        if key not in self._metrics_cache:
+            logprobs = self._model.fill_ent_tuple_in_prompt(
+                prompt=prompt, ent_tuple=ent_tuple)['mask_logprobs']
+
+            token_wise_score = sum(logprobs) / len(logprobs)
+            ent_wise_score = sum(logprobs) / len(ent_tuple)
+            min_score = min(logprobs)
+
+            self._metrics_cache[key] = \
+                (token_wise_score, ent_wise_score, min_score)
 
-        token_wise_score = sum(logprobs) / len(logprobs)
-        ent_wise_score = sum(logprobs) / len(ent_tuple)
-        min_score = min(logprobs)
+        return self._metrics_cache[key]
 
-        return (token_wise_score + ent_wise_score + min_score) / 3.
     @property
     def weighted_ent_tuples(self):
         return self._weighted_ent_tuples
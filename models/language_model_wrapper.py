@@ -1,6 +1,7 @@
 import string
 import torch
 from copy import deepcopy
+from contextlib import nullcontext
 from transformers import AutoTokenizer, AutoModelForMaskedLM
 from data_utils.data_utils import stopwords, get_n_ents, get_sent, find_sublist
 
@@ -9,31 +10,51 @@ DEVICE = 'cuda' if torch.cuda.is_available() else 'mps'
 
 
 class LanguageModelWrapper:
-    def __init__(self, model_name):
+    def __init__(self, model_name, device=DEVICE, compile_model=False,
+                 use_fp16=False):
         self._model_name = model_name
+        self._device = device
+        self._use_fp16 = use_fp16
 
         self._tokenizer = AutoTokenizer.from_pretrained(model_name)
         self._model = AutoModelForMaskedLM.from_pretrained(model_name)
 
         self._model.eval()
-        self._model.to(DEVICE)
+        self._model.to(self._device)
+        if compile_model:
+            # dynamic shapes: prompt lengths vary from call to call
+            self._model = torch.compile(self._model, dynamic=True)
+
+        # every token id is decoded once up front and looked up afterwards
+        self._decoded_vocab = self._tokenizer.batch_decode(
+            [[idx] for idx in range(self._model.config.vocab_size)])
 
         self._banned_ids = None
         self._get_banned_ids()
 
     def _get_banned_ids(self):
         self._banned_ids = self._tokenizer.all_special_ids
-        for idx in range(self._tokenizer.vocab_size):
-            if self._tokenizer.decode(idx).lower().strip() in stopwords:
+        for idx, token in enumerate(self._decoded_vocab):
+            if token.lower().strip() in stopwords:
                 self._banned_ids.append(idx)
 
-    def get_mask_logits(self, input_text):
-        with torch.no_grad():
-            inputs = self.tokenizer(input_text, return_tensors="pt").to(DEVICE)
+    def _autocast(self):
+        # opt-in fp16 forward passes, only supported on cuda
+        if self._use_fp16 and self._device.startswith('cuda'):
+            return torch.autocast(device_type='cuda', dtype=torch.float16)
+        return nullcontext()
+
+    def get_batch_mask_logits(self, input_texts):
+        with torch.inference_mode(), self._autocast():
+            inputs = self.tokenizer(
+                input_texts, padding=True, return_tensors="pt"
+            ).to(self._device)
             outputs = self.model(**inputs)
 
-        return outputs.logits[
-            inputs['input_ids'] == self.tokenizer.mask_token_id]
+        is_mask = inputs['input_ids'] == self.tokenizer.mask_token_id
+        mask_logits = outputs.logits[is_mask].float()
+
+        return torch.split(mask_logits, is_mask.sum(dim=-1).tolist())
 
     def fill_ent_tuple_in_prompt(self, prompt, ent_tuple):
         assert get_n_ents(prompt) == len(ent_tuple)
@@ -50,17 +71,25 @@ class LanguageModelWrapper:
         for mask_span in mask_spans:
             mask_positions.extend([pos for pos in range(*mask_span)])
 
-        masked_inputs = self.tokenizer(
-            [sent] * len(mask_positions), return_tensors='pt').to(DEVICE)
+        inputs = self.tokenizer(sent, return_tensors='pt')
+        input_ids = inputs['input_ids'][0].tolist()
+
+        # masking is done on the host so no per-position device sync is needed
+        masked_inputs = {
+            key: value.repeat(len(mask_positions), 1)
+            for key, value in inputs.items()}
         label_token_ids = []
         for i, pos in enumerate(mask_positions):
-            label_token_ids.append(masked_inputs['input_ids'][i][pos].item())
+            label_token_ids.append(input_ids[pos])
             masked_inputs['input_ids'][i][mask_positions[i:]] = \
                 self.tokenizer.mask_token_id
+        masked_inputs = {
+            key: value.to(self._device)
+            for key, value in masked_inputs.items()}
 
-        with torch.no_grad():
+        with torch.inference_mode(), self._autocast():
             logits = self.model(**masked_inputs).logits
-            logprobs = torch.log_softmax(logits, dim=-1)
+            logprobs = torch.log_softmax(logits.float(), dim=-1)
 
         mask_logprobs = logprobs[
             torch.arange(len(mask_positions)), mask_positions,
@@ -69,7 +98,7 @@ class LanguageModelWrapper:
         torch.cuda.empty_cache()
 
         return {
-            'input_ids': self.tokenizer.encode(sent),
+            'input_ids': input_ids,
             'mask_spans': mask_spans,
             'mask_positions': mask_positions,
             'mask_logprobs': mask_logprobs
@@ -122,6 +151,10 @@ class LanguageModelWrapper:
     def model(self):
         return self._model
 
+    @property
+    def decoded_vocab(self):
+        return self._decoded_vocab
+
     @property
     def banned_ids(self):
         return self._banned_ids
@@ -8,10 +8,16 @@ from prettytable import PrettyTable
 
 def main(result_dir, n_present=20):
     rel_set = result_dir.split('/')[1]
-    relation_info = json.load(open(f'relation_info/{rel_set}.json'))
+    with open(f'relation_info/{rel_set}.json') as f:
+        relation_info = json.load(f)
 
-    summary_file = open(f'{result_dir}/summary.txt', 'w')
+    with open(f'{result_dir}/summary.txt', 'w') as summary_file:
+        present_relations(result_dir, relation_info, n_present, summary_file)
 
+    print(f'This summary has been saved into {summary_file.name}.')
+
+
+def present_relations(result_dir, relation_info, n_present, summary_file):
     for rel, info in relation_info.items():
         columns = {'Seed samples': info['seed_ent_tuples']}
 
@@ -19,9 +25,10 @@ def main(result_dir, n_present=20):
             print(f'outputs of relation \"{rel}\" not found. skipped.')
             continue
 
-        weighted_prompts = json.load(open(f'{result_dir}/{rel}/prompts.json'))
-        weighted_ent_tuples = json.load(open(
-            f'{result_dir}/{rel}/ent_tuples.json'))
+        with open(f'{result_dir}/{rel}/prompts.json') as f:
+            weighted_prompts = json.load(f)
+        with open(f'{result_dir}/{rel}/ent_tuples.json') as f:
+            weighted_ent_tuples = json.load(f)
 
         if len(weighted_ent_tuples) == 0:
             print(f'outputs of relation \"{rel}\" not found. skipped.')
@@ -53,8 +60,6 @@ def main(result_dir, n_present=20):
         _print_results(output_file=summary_file)
         _print_results(output_file=sys.stdout)
 
-    print(f'This summary has been saved into {summary_file.name}.')
-
 
 if __name__ == '__main__':
     fire.Fire(main)
@@ -1,5 +1,6 @@
 import re
 import typing
+import functools
 import pathlib
 import unidecode
 import owlready2 as owlready
@@ -30,33 +31,6 @@ def human_name(cls_or_instance: owlready.ThingClass | owlready.Thing) -> str:
     return first_or_none(cls_or_instance.fancyName) or cls_or_instance.name
 
 
-def overlap(a: typing.Iterable, b: typing.Iterable) -> bool:
-    met_in_a = set()
-    met_in_b = set()
-    iter_a = iter(a)
-    iter_b = iter(b)
-    over_a = False
-    over_b = False
-    while not (over_a and over_b):
-        if not over_a:
-            try:
-                item_a = next(iter_a)
-                if item_a in met_in_b:
-                    return True
-                met_in_a.add(item_a)
-            except StopIteration:
-                over_a = True
-        if not over_b:
-            try:
-                item_b = next(iter_b)
-                if item_b in met_in_a:
-                    return True
-                met_in_b.add(item_b)
-            except StopIteration:
-                over_b = True
-    return False
-
-
 def replace_symbols_with(name: str, replacement: str) -> str:
     replaced = PATTERN_SYMBOLS.sub(replacement, name)
     while replaced.endswith(replacement):
@@ -64,12 +38,31 @@ def replace_symbols_with(name: str, replacement: str) -> str:
     return replaced
 
 
+# Hierarchy lookups are memoized process-wide, shared by every loaded ontology.
+# The cache is cleared when a KnowledgeGraph loads its ontology and when
+# add_property edits a class; any other change to is_a must be followed by
+# clear_hierarchy_cache(), otherwise subtype/supertype return stale results.
+@functools.lru_cache(maxsize=None)
+def _ancestors(cls: owlready.ThingClass, include_self: bool) -> typing.FrozenSet[owlready.ThingClass]:
+    return frozenset(cls.ancestors(include_self=include_self))
+
+
+@functools.lru_cache(maxsize=None)
+def _descendants(cls: owlready.ThingClass, include_self: bool) -> typing.FrozenSet[owlready.ThingClass]:
+    return frozenset(cls.descendants(include_self=include_self))
+
+
+def clear_hierarchy_cache() -> None:
+    _ancestors.cache_clear()
+    _descendants.cache_clear()
+
+
 def subtype(cls1: owlready.ThingClass, cls2: owlready.ThingClass, strict: bool = False) -> bool:
-    return overlap([cls1], cls2.descendants(include_self=not strict))
+    return cls1 in _descendants(cls2, not strict)
 
 
 def supertype(cls1: owlready.ThingClass, cls2: owlready.ThingClass, strict: bool = False) -> bool:
-    return overlap([cls1], cls2.ancestors(include_self=not strict))
+    return cls1 in _ancestors(cls2, not strict)
 
 
 def owl_name(name: str, instance: bool = True) -> str:
@@ -86,6 +79,7 @@ class KnowledgeGraph:
     def __init__(self, path: pathlib.Path = PATH_ONTOLOGY) -> None:
         self._path = path
         self._uri = path.as_uri()
+        self._instances_by_class: typing.Dict[owlready.ThingClass, typing.Dict[str, owlready.Thing]] = {}
 
     @property
     def path(self) -> pathlib.Path:
@@ -93,6 +87,7 @@ class KnowledgeGraph:
 
     @LazyProperty
     def onto(self) -> owlready.Ontology:
+        clear_hierarchy_cache()
         return owlready.get_ontology(self._uri).load(only_local=True, reload=True, reload_if_newer=True)
 
     def _find_root_class(self):
@@ -105,6 +100,22 @@ class KnowledgeGraph:
         else:
             return owlready.Thing
 
+    # Per-class name index used by add_instance. It is reset when add_property
+    # edits a class; any other change to is_a must also clear it, otherwise
+    # lookups can miss instances that moved under a class.
+    def _instances_by_name(self, cls: owlready.ThingClass) -> typing.Dict[str, owlready.Thing]:
+        if cls not in self._instances_by_class:
+            instances = {}
+            for instance in cls.instances():
+                instances.setdefault(instance.name, instance)
+            self._instances_by_class[cls] = instances
+        return self._instances_by_class[cls]
+
+    def _index_instance(self, instance: owlready.Thing) -> None:
+        for cls, instances in self._instances_by_class.items():
+            if isinstance(instance, cls):
+                instances.setdefault(instance.name, instance)
+
     def add_property(self, cls_or_instance: owlready.ThingClass | owlready.Thing,
                      property: str | owlready.ObjectPropertyClass,
                      value: owlready.ThingClass | owlready.Thing | str) -> None:
@@ -113,6 +124,9 @@ class KnowledgeGraph:
         property_values = getattr(cls_or_instance, property)
         if value not in property_values:
             property_values.append(value)
+            if isinstance(cls_or_instance, owlready.ThingClass):
+                clear_hierarchy_cache()
+                self._instances_by_class.clear()
 
     def set_class_of_instance(self, instance: owlready.Thing, cls: str | owlready.ThingClass) -> owlready.Thing:
         initial = set(instance.is_instance_of)
@@ -138,7 +152,7 @@ class KnowledgeGraph:
         fancy_name = name
         name = owl_name(name)
         cls = self.onto[cls] if isinstance(cls, str) else cls
-        instance = first_or_none(filter(lambda i: i.name == name, cls.instances()))
+        instance = self._instances_by_name(cls).get(name)
         if instance is not None:
             if add_to_class_if_existing:
                 self.set_class_of_instance(instance, cls)
@@ -146,6 +160,7 @@ class KnowledgeGraph:
                 raise KeyError(f"Instance {name} already exists in classes {instance.is_instance_of}")
         else:
             instance = cls(name)
+        self._index_instance(instance)
         if self.onto.fancyName is not None and name != fancy_name:
             self.add_property(instance, "fancyName", fancy_name)
         return instance
@@ -161,6 +176,9 @@ class KnowledgeGraph:
                 prop_values = getattr(instance2, prop.name)
                 for value in prop_values:
                     self.add_property(instance1, prop.name, value)
+        for instances in self._instances_by_class.values():
+            if instances.get(instance2.name) is instance2:
+                del instances[instance2.name]
         owlready.destroy_entity(instance2)
         return True
 